@@ -1,15 +1,14 @@
 import streamlit as st
-from streamlit_ace import st_ace
 import streamlit.components.v1 as components
 import os
 import re
-import glob
-import markdown
-import base64
+import time
+import functools
 from pathlib import Path
-import importlib.util
-import sys
-from io import StringIO
+import types
+from io import TextIOBase
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import contextlib
 import json
 from datetime import datetime, date
@@ -17,82 +16,263 @@ import calendar
 
 # Constants
 PROBLEMS_DIR = "Problems"
-SUPPORTED_EXTENSIONS = ['.md', '.html', '.py']
+SUPPORTED_EXTENSIONS = ('.md', '.html', '.py')
 USER_DATA_FILE = "user_data.json"
 
+# Precompiled patterns
+_NUM_RE = re.compile(r'(\d+)_')
+
+# TeX delimiter rewrite table; the alternation and bound sub are built once
+# at import so adding a delimiter is a one-line table change
+_DELIM_TOKENS = {'\\(': '$', '\\)': '$', '\\[': '$$', '\\]': '$$'}
+_DELIM_SUB = re.compile('|'.join(re.escape(k) for k in _DELIM_TOKENS)).sub
+
+def _expand_delims(content):
+    """Rewrite TeX bracket delimiters to dollar form in a single pass"""
+    return _DELIM_SUB(lambda m: _DELIM_TOKENS[m.group(0)], content)
+
+@functools.lru_cache(maxsize=1)
+def _get_md():
+    """Build the markdown parser on first use -- reusing one instance is much
+    cheaper than reconstructing the extension pipeline on every render"""
+    from markdown_it import MarkdownIt
+    return MarkdownIt('commonmark', {'html': True}).enable('table')
+
 # Utility Functions
+@functools.lru_cache(maxsize=4096)
+def _dir_sort_key(dirname):
+    """Numeric prefix of a problem directory name, memoized since names are stable"""
+    match = _NUM_RE.match(dirname)
+    return int(match.group(1)) if match else float('inf')
+
+@st.cache_data(ttl=60)
 def get_problem_directories():
     """Get all problem directories sorted numerically"""
     if not os.path.exists(PROBLEMS_DIR):
         os.makedirs(PROBLEMS_DIR)
-        
-    problem_dirs = [d for d in os.listdir(PROBLEMS_DIR) 
-                   if os.path.isdir(os.path.join(PROBLEMS_DIR, d))]
-    
-    def get_number(dirname):
-        match = re.match(r'(\d+)_', dirname)
-        return int(match.group(1)) if match else float('inf')
-    
-    return sorted(problem_dirs, key=get_number)
+
+    with os.scandir(PROBLEMS_DIR) as entries:
+        problem_dirs = [e.name for e in entries
+                       if e.is_dir(follow_symlinks=False)]
+
+    return sorted(problem_dirs, key=_dir_sort_key)
+
+@st.cache_data(ttl=60)
+def list_problem_files(problem_dir):
+    """List the supported files inside a problem directory"""
+    if not os.path.exists(problem_dir):
+        return []
+    with os.scandir(problem_dir) as entries:
+        # str.endswith with a tuple is a single C-level check per name,
+        # cheaper than splitext + membership test
+        return sorted(e.name for e in entries
+                      if e.is_file() and e.name.endswith(SUPPORTED_EXTENSIONS))
+
+@st.cache_data(show_spinner=False)
+def _read(path, mtime_ns, size):
+    """Read a file, cached on (path, mtime, size) so unchanged files hit the cache"""
+    return Path(path).read_text(encoding='utf-8')
 
 def load_file_content(file_path):
     """Load and return file content with proper encoding"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        stat = os.stat(file_path)
+        return _read(file_path, stat.st_mtime_ns, stat.st_size)
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return ""
 
+# Shared pool for bulk file reads; threads release the GIL during IO
+_POOL = ThreadPoolExecutor(max_workers=8)
+
+def load_many(file_paths):
+    """Read several files concurrently so the disk reads overlap.
+
+    Failures degrade per file like load_file_content: the error is shown
+    and an empty string returned for that path. Errors are collected in
+    the workers but reported here, on the script thread, since st calls
+    need the script run context.
+    """
+    def read_one(path):
+        try:
+            return Path(path).read_text(encoding='utf-8'), None
+        except Exception as e:
+            return "", f"Error loading file: {e}"
+
+    contents = []
+    for content, error in _POOL.map(read_one, file_paths):
+        if error:
+            st.error(error)
+        contents.append(content)
+    return contents
+
 def save_file_content(file_path, content):
-    """Save content to file with proper encoding"""
+    """Save content to file with proper encoding; True if the write succeeded"""
     try:
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
+        _read.clear()
+        get_problem_solutions.clear()
         st.success(f"Successfully saved changes to {file_path}")
+        return True
     except Exception as e:
         st.error(f"Error saving file: {e}")
+        return False
+
+@st.cache_data(show_spinner=False)
+def _render_markdown(content):
+    """Convert markdown to HTML, cached since rendering is pure and dominates preview cost"""
+    return _get_md().render(content)
+
+@functools.lru_cache(maxsize=128)
+def _compile_source(source, filename='<string>'):
+    """Compile source to a code object once per unique content, so repeated
+    runs of the same code skip the tokenizer/parser/bytecode emit"""
+    return compile(source, filename, 'exec')
+
+def _exec_isolated(code_obj):
+    """Run a code object in a throwaway module namespace so user globals
+    neither leak into the app nor outlive the run"""
+    module = types.ModuleType('user_code')
+    exec(code_obj, module.__dict__)
+
+class _StreamSink(TextIOBase):
+    """Bounded stdout sink that streams into a st.empty placeholder.
+
+    Keeps at most `cap` characters of output so chatty user code can't
+    retain unbounded memory. Placeholder updates are throttled: the text
+    is re-rendered once `flush_every` bytes have accumulated or
+    `interval` seconds have passed since the last push, not on every
+    write, so a print-heavy loop doesn't emit one delta per print. The
+    caller flushes whatever remains when the run finishes.
+    """
+    def __init__(self, placeholder, cap=64_000, flush_every=8_000, interval=0.1):
+        self.placeholder = placeholder
+        self.cap = cap
+        self.flush_every = flush_every
+        self.interval = interval
+        self.chunks = deque()
+        self.size = 0
+        self.pending = 0
+        self.last_push = 0.0
+
+    def write(self, s):
+        self.chunks.append(s)
+        self.size += len(s)
+        self.pending += len(s)
+        while self.size > self.cap and len(self.chunks) > 1:
+            self.size -= len(self.chunks.popleft())
+        if (self.pending >= self.flush_every
+                or time.monotonic() - self.last_push >= self.interval):
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self.pending:
+            self.placeholder.text(''.join(self.chunks))
+            self.pending = 0
+        self.last_push = time.monotonic()
+
+@st.cache_data(show_spinner=False)
+def _highlight_code(source, lang):
+    """Syntax-highlight source to HTML, cached -- st.code re-tokenizes
+    the whole file with Pygments on every rerun"""
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    return highlight(source, get_lexer_by_name(lang), HtmlFormatter(noclasses=True))
+
+def run_user_code(source, filename):
+    """Compile, execute and stream the output of user-submitted code"""
+    st.write("### Output:")
+    sink = _StreamSink(st.empty())
+    try:
+        with contextlib.redirect_stdout(sink):
+            _exec_isolated(_compile_source(source, filename))
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+    finally:
+        sink.flush()
+
+def _has_math(content):
+    """Check whether content contains any math delimiters"""
+    return any(tok in content for tok in ('$', '\\(', '\\['))
+
+_MATHJAX_LOCAL = Path("static/mathjax/tex-chtml.js")
+_MATHJAX_CDN = "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"
+
+@st.cache_resource
+def _mathjax_src():
+    """URL of the MathJax bundle, preferring the locally vendored copy.
 
-def render_math_content(content, file_ext):
-    """Render content with MathJax support"""
-    if file_ext == '.md':
-        content = markdown.markdown(content)
-    
-    content = re.sub(r'\\\(', r'$', content)
-    content = re.sub(r'\\\)', r'$', content)
-    content = re.sub(r'\\\[', r'$$', content)
-    content = re.sub(r'\\\]', r'$$', content)
-    
-    return components.html(
-        f"""
-        <div style="padding: 20px;">
-            {content}
-        </div>
-        <script>
-            window.MathJax = {{
-                tex: {{
-                    inlineMath: [['$', '$'], ['\\\\(', '\\\\)']],
-                    displayMath: [['$$', '$$'], ['\\\\[', '\\\\]']]
-                }},
-                svg: {{
-                    fontCache: 'global'
-                }}
-            }};
-        </script>
-        <script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-        """,
-        height=600,
-        scrolling=True
+    The vendored copy is served by Streamlit's static file server (see
+    .streamlit/config.toml), so the browser HTTP cache is hit across
+    component iframes instead of going back to the CDN each time.
+    """
+    if _MATHJAX_LOCAL.exists():
+        return "/app/static/mathjax/tex-chtml.js"
+    return _MATHJAX_CDN
+
+@st.cache_resource
+def _mathjax_shell():
+    """Constant HTML wrapped around the rendered content, built once per session"""
+    prefix = "<div style='padding: 20px;'>"
+    suffix = (
+        "</div>"
+        "<script>"
+        "window.MathJax = {"
+        "tex: {"
+        "inlineMath: [['$', '$'], ['\\\\(', '\\\\)']],"
+        "displayMath: [['$$', '$$'], ['\\\\[', '\\\\]']]"
+        "},"
+        "options: {enableMenu: false},"
+        "chtml: {adaptiveCSS: true}"
+        "};"
+        "</script>"
+        f"<script src='{_mathjax_src()}' async></script>"
     )
+    return prefix, suffix
+
+def render_math_content(blocks, height=600):
+    """Render one or more (content, file_ext) blocks with MathJax support.
+
+    All blocks go into a single components.html call so MathJax is
+    initialized once, not once per iframe. The assembled HTML is kept in
+    session state keyed by a content hash, so reruns where nothing changed
+    cost a single hash() call instead of re-running the render pipeline.
+    """
+    key = hash(tuple(blocks))
+    if st.session_state.get('_math_html_key') == key:
+        html = st.session_state['_math_html']
+    else:
+        content = "<hr>".join(
+            _render_markdown(block) if file_ext == '.md' else block
+            for block, file_ext in blocks
+        )
+
+        prefix, suffix = _mathjax_shell()
+
+        # Skip the MathJax payload entirely when there is no math to typeset
+        if not _has_math(content):
+            html = prefix + content + "</div>"
+        else:
+            html = prefix + _expand_delims(content) + suffix
+
+        st.session_state['_math_html_key'] = key
+        st.session_state['_math_html'] = html
 
+    return components.html(html, height=height, scrolling=True)
+
+@st.cache_data(ttl=30)
 def get_problem_solutions(problem_dir):
     """Get all solution files for a problem"""
-    solutions = []
-    if os.path.exists(problem_dir):
-        for file in os.listdir(problem_dir):
-            if file.startswith('solution') and file.endswith('.py'):
-                solutions.append(file)
-    return sorted(solutions)
+    if not os.path.exists(problem_dir):
+        return []
+    with os.scandir(problem_dir) as entries:
+        return sorted(e.name for e in entries
+                      if e.is_file()
+                      and e.name.startswith('solution')
+                      and e.name.endswith('.py'))
 
 # User Progress Management
 class UserProgress:
@@ -137,13 +317,17 @@ class UserProgress:
 # UI Components
 def setup_page():
     """Configure the Streamlit page settings"""
-    st.set_page_config(
-        page_title="Deep-ML Interactive Platform",
-        page_icon="📚",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
-    
+    # set_page_config is a no-op after the first call but still validates
+    # its arguments every rerun; only call it once per session
+    if "page_configured" not in st.session_state:
+        st.set_page_config(
+            page_title="Deep-ML Interactive Platform",
+            page_icon="📚",
+            layout="wide",
+            initial_sidebar_state="expanded"
+        )
+        st.session_state["page_configured"] = True
+
     # Custom CSS
     st.markdown("""
         <style>
@@ -294,15 +478,17 @@ def render_problem_solver(problem):
     # Description Tab
     with tabs[0]:
         description_file = next(
-            (f for f in os.listdir(problem_path) if f.startswith("learn.")),
+            (f for f in list_problem_files(problem_path) if f.startswith("learn.")),
             None
         )
         if description_file:
             content = load_file_content(os.path.join(problem_path, description_file))
-            render_math_content(content, os.path.splitext(description_file)[1])
+            render_math_content([(content, description_file[description_file.rfind('.'):])])
     
     # Editor Tab
     with tabs[1]:
+        from streamlit_ace import st_ace
+
         st.write("## Code Editor")
         code = st_ace(
             placeholder="Write your solution here...",
@@ -316,14 +502,7 @@ def render_problem_solver(problem):
         
         with col1:
             if st.button("Run Code", key=f"run_{problem['id']}"):
-                try:
-                    with StringIO() as buf, contextlib.redirect_stdout(buf):
-                        exec(code)
-                        output = buf.getvalue()
-                    st.write("### Output:")
-                    st.code(output)
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+                run_user_code(code, '<editor>')
         
         with col2:
             if st.button("Submit", key=f"submit_{problem['id']}"):
@@ -333,10 +512,15 @@ def render_problem_solver(problem):
                     key=f"solution_name_{problem['id']}"
                 )
                 if st.button("Save Solution", key=f"save_{problem['id']}"):
-                    save_file_content(
-                        os.path.join(problem_path, solution_name),
-                        code
-                    )
+                    # Only hit the disk when this file's content actually changed
+                    save_key = f"saved_hash_{problem['id']}_{solution_name}"
+                    code_hash = hash(code)
+                    if st.session_state.get(save_key) != code_hash:
+                        if save_file_content(
+                            os.path.join(problem_path, solution_name),
+                            code
+                        ):
+                            st.session_state[save_key] = code_hash
                     st.session_state.user_progress.mark_problem_complete(problem['id'])
     
     # Solutions Tab
@@ -353,17 +537,11 @@ def render_problem_solver(problem):
                 solution_content = load_file_content(
                     os.path.join(problem_path, selected_solution)
                 )
-                st.code(solution_content, language='python')
+                st.markdown(_highlight_code(solution_content, 'python'),
+                            unsafe_allow_html=True)
                 
                 if st.button("Run Solution", key=f"run_solution_{problem['id']}"):
-                    try:
-                        with StringIO() as buf, contextlib.redirect_stdout(buf):
-                            exec(solution_content)
-                            output = buf.getvalue()
-                        st.write("### Output:")
-                        st.code(output)
-                    except Exception as e:
-                        st.error(f"Error: {str(e)}")
+                    run_user_code(solution_content, selected_solution)
         else:
             st.info("No solutions available yet.")
 
@@ -476,9 +654,10 @@ def render_user_profile():
                 solutions = get_problem_solutions(problem_path)
                 if solutions:
                     st.write("**Your Solutions:**")
-                    for solution in solutions:
-                        st.code(load_file_content(os.path.join(problem_path, solution)), 
-                               language='python')
+                    solution_paths = [os.path.join(problem_path, s) for s in solutions]
+                    for content in load_many(solution_paths):
+                        st.markdown(_highlight_code(content, 'python'),
+                                    unsafe_allow_html=True)
     else:
         st.info("You haven't solved any problems yet. Start solving to build your history!")
 
@@ -541,15 +720,19 @@ def render_submit_problem():
                 problem_dir = f"{problem_number}_{problem_title.replace(' ', '_')}"
                 problem_path = os.path.join(PROBLEMS_DIR, problem_dir)
                 os.makedirs(problem_path, exist_ok=True)
-                
-                # Save description
-                with open(os.path.join(problem_path, 'learn.md'), 'w') as f:
-                    f.write(description)
-                
-                # Save sample solution
-                with open(os.path.join(problem_path, 'solution.py'), 'w') as f:
-                    f.write(sample_solution)
-                
+
+                # Write both files with raw os.open/os.write -- no buffered
+                # IO layer, and O_EXCL refuses to clobber an existing problem
+                for filename, text in (('learn.md', description),
+                                       ('solution.py', sample_solution)):
+                    fd = os.open(os.path.join(problem_path, filename),
+                                 os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                    try:
+                        os.write(fd, text.encode('utf-8'))
+                    finally:
+                        os.close(fd)
+
+                get_problem_directories.clear()
                 st.success("Problem submitted successfully!")
                 
             except Exception as e: